@@ -12,18 +12,38 @@ This tool performs routine maintenance operations including:
 """
 
 import os
+import re
 import sys
 import json
+import base64
+import binascii
 import logging
 import argparse
-import subprocess
+import errno
+import select
+import socket
+import selectors
 import datetime
-from pathlib import Path
+import threading
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 import mysql.connector
+import mysql.connector.pooling
 import requests
 import psutil
 
+try:
+    from cryptography import x509
+except ImportError:
+    x509 = None
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
 # Configuration
 CONFIG = {
     'services': ['kamailio', 'freeradius', 'mariadb', 'keepalived'],
@@ -33,6 +53,7 @@ CONFIG = {
     'max_disk_usage_percent': 85,
     'prometheus_url': 'http://jumphost.lab.local:9090',
     'grafana_url': 'http://jumphost.lab.local:3000',
+    'pushgateway_url': 'jumphost.lab.local:9091',
     'mysql_config': {
         'host': 'localhost',
         'user': 'root',
@@ -41,6 +62,83 @@ CONFIG = {
     }
 }
 
+# Rotated log file suffixes eligible for cleanup
+LOG_SUFFIXES = ('.log', '.1', '.2', '.3')
+
+_GIB = 1 << 30
+
+def _gb(n: float) -> float:
+    """Convert a byte count to gigabytes, rounded for reports."""
+    return round(n / _GIB, 2)
+
+@functools.lru_cache(maxsize=64)
+def _resolve(host: str) -> Optional[str]:
+    """Resolve a hostname to its first IPv4 address, caching the result.
+
+    The lab hosts are checked repeatedly within a run; one nsswitch/DNS
+    round per name is enough.
+    """
+    try:
+        return socket.getaddrinfo(host, None, socket.AF_INET)[0][4][0]
+    except OSError:
+        return None
+
+def _der_not_after(der: bytes) -> Optional[datetime.datetime]:
+    """Extract notAfter from a DER certificate without external parsers.
+
+    Walks just enough of the TBSCertificate to reach validity — skip the
+    optional [0] version, serial, signature algorithm and issuer, then
+    read the second time value — so no openssl fork and no big library
+    import are needed for an expiry check.
+    """
+    def read_tlv(buf: bytes, pos: int) -> Tuple[int, int, int]:
+        tag = buf[pos]
+        length = buf[pos + 1]
+        pos += 2
+        if length & 0x80:
+            nbytes = length & 0x7f
+            length = int.from_bytes(buf[pos:pos + nbytes], 'big')
+            pos += nbytes
+        return tag, pos, pos + length
+
+    try:
+        _, pos, _ = read_tlv(der, 0)                # Certificate
+        _, pos, _ = read_tlv(der, pos)              # tbsCertificate
+        tag, _, end = read_tlv(der, pos)
+        if tag == 0xa0:                             # optional [0] version
+            tag, _, end = read_tlv(der, end)        # serial INTEGER
+        for _ in range(2):                          # signature, issuer
+            tag, _, end = read_tlv(der, end)
+        _, pos, _ = read_tlv(der, end)              # validity SEQUENCE
+        _, _, end = read_tlv(der, pos)              # notBefore
+        tag, start, end = read_tlv(der, end)        # notAfter
+        value = der[start:end].decode('ascii')
+    except (IndexError, UnicodeDecodeError):
+        return None
+
+    if tag == 0x17:                                 # UTCTime
+        fmt = '%y%m%d%H%M%SZ'
+    elif tag == 0x18:                               # GeneralizedTime
+        fmt = '%Y%m%d%H%M%SZ'
+    else:
+        return None
+
+    try:
+        parsed = datetime.datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=datetime.timezone.utc)
+
+def _pem_not_after(pem: bytes) -> Optional[datetime.datetime]:
+    """Decode the first PEM certificate block and pull out notAfter."""
+    try:
+        body = pem.split(b'-----BEGIN CERTIFICATE-----', 1)[1]
+        body = body.split(b'-----END CERTIFICATE-----', 1)[0]
+        der = base64.b64decode(body)
+    except (IndexError, binascii.Error):
+        return None
+    return _der_not_after(der)
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -61,51 +159,170 @@ class MaintenanceTool:
             'hostname': os.uname().nodename,
             'tasks': {}
         }
+        self.report_payload = None
+        # Guards for the concurrent full-maintenance run
+        self._results_lock = threading.Lock()
+        self._cleanup_guard = threading.Lock()
+        self._logs_cleaned = False
+        self._mysql_pool = None
+        self._pool_lock = threading.Lock()
+
+    def _store_result(self, task: str, value: Dict) -> None:
+        """Record a task result; safe to call from worker threads."""
+        with self._results_lock:
+            self.results['tasks'][task] = value
     
-    def run_command(self, command: str) -> Tuple[int, str, str]:
-        """Execute shell command and return exit code, stdout, stderr."""
+    def _spawn_capture(self, argv: List[str],
+                       timeout: float = 300) -> Tuple[int, str, str]:
+        """Run argv via posix_spawn, capturing stdout and stderr.
+
+        posix_spawn skips fork's page-table copy, which matters once this
+        process has mysql.connector/psutil/requests resident; the many
+        cheap systemctl/nc/openssl probes all come through here.
+        """
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+
         try:
-            result = subprocess.run(
-                command.split(),
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
-            return result.returncode, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
+            pid = os.posix_spawnp(argv[0], argv, dict(os.environ), file_actions=[
+                (os.POSIX_SPAWN_DUP2, out_w, 1),
+                (os.POSIX_SPAWN_DUP2, err_w, 2),
+                (os.POSIX_SPAWN_CLOSE, out_r),
+                (os.POSIX_SPAWN_CLOSE, err_r),
+                (os.POSIX_SPAWN_CLOSE, out_w),
+                (os.POSIX_SPAWN_CLOSE, err_w),
+            ])
+        except OSError as e:
+            for fd in (out_r, out_w, err_r, err_w):
+                os.close(fd)
+            return 1, "", str(e)
+
+        os.close(out_w)
+        os.close(err_w)
+
+        chunks = {out_r: [], err_r: []}
+        sel = selectors.DefaultSelector()
+        sel.register(out_r, selectors.EVENT_READ)
+        sel.register(err_r, selectors.EVENT_READ)
+
+        deadline = time.monotonic() + timeout
+        timed_out = False
+        try:
+            while sel.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in sel.select(remaining):
+                    data = os.read(key.fd, 65536)
+                    if data:
+                        chunks[key.fd].append(data)
+                    else:
+                        sel.unregister(key.fd)
+        finally:
+            sel.close()
+            os.close(out_r)
+            os.close(err_r)
+
+        if timed_out:
+            try:
+                os.kill(pid, 9)
+            except OSError:
+                pass
+            os.waitpid(pid, 0)
             return 1, "", "Command timed out"
+
+        _, status = os.waitpid(pid, 0)
+        returncode = os.waitstatus_to_exitcode(status)
+        stdout = b''.join(chunks[out_r]).decode(errors='replace')
+        stderr = b''.join(chunks[err_r]).decode(errors='replace')
+        return returncode, stdout, stderr
+
+    def run_command(self, argv: List[str]) -> Tuple[int, str, str]:
+        """Execute a command given as argv and return exit code, stdout, stderr.
+
+        Taking a list avoids re-splitting a string on every call and
+        keeps paths with spaces (cert and backup locations) intact.
+        """
+        try:
+            return self._spawn_capture(argv)
         except Exception as e:
             return 1, "", str(e)
     
-    def check_service_health(self) -> Dict:
-        """Check status of critical telecom services."""
-        logger.info("Checking service health...")
+    def _check_one_service(self, service: str) -> Dict:
+        """Query active/enabled state for a single service."""
+        returncode, stdout, stderr = self.run_command(["systemctl", "is-active", service])
+        is_active = returncode == 0 and stdout.strip() == "active"
+
+        returncode, stdout, stderr = self.run_command(["systemctl", "is-enabled", service])
+        is_enabled = returncode == 0 and stdout.strip() == "enabled"
+
+        return {
+            'active': is_active,
+            'enabled': is_enabled,
+            'status': 'healthy' if is_active and is_enabled else 'unhealthy'
+        }
+
+    def _query_services_batch(self, services: List[str]) -> Optional[Dict]:
+        """Fetch all service states in a single systemctl spawn.
+
+        systemctl show accepts multiple units and emits one blank-line
+        separated record per unit; returns None when the output doesn't
+        line up so the caller can fall back to per-service queries.
+        """
+        returncode, stdout, stderr = self.run_command(
+            ["systemctl", "show", "--property=ActiveState",
+             "--property=UnitFileState"] + services
+        )
+        if returncode != 0:
+            return None
+
+        records = [r for r in stdout.strip().split('\n\n') if r.strip()]
+        if len(records) != len(services):
+            return None
+
         health_status = {}
-        
-        for service in CONFIG['services']:
-            returncode, stdout, stderr = self.run_command(f"systemctl is-active {service}")
-            is_active = returncode == 0 and stdout.strip() == "active"
-            
-            returncode, stdout, stderr = self.run_command(f"systemctl is-enabled {service}")
-            is_enabled = returncode == 0 and stdout.strip() == "enabled"
-            
+        for service, record in zip(services, records):
+            props = dict(line.split('=', 1)
+                         for line in record.splitlines() if '=' in line)
+            is_active = props.get('ActiveState') == 'active'
+            is_enabled = props.get('UnitFileState') == 'enabled'
             health_status[service] = {
                 'active': is_active,
                 'enabled': is_enabled,
                 'status': 'healthy' if is_active and is_enabled else 'unhealthy'
             }
-            
-            if not is_active:
+        return health_status
+
+    def check_service_health(self) -> Dict:
+        """Check status of critical telecom services."""
+        logger.info("Checking service health...")
+
+        # One batched systemctl show replaces two spawns per service;
+        # fall back to concurrent per-service queries if parsing fails.
+        services = CONFIG['services']
+        health_status = self._query_services_batch(services)
+
+        if health_status is None:
+            health_status = {}
+            with ThreadPoolExecutor(max_workers=len(services)) as executor:
+                futures = {service: executor.submit(self._check_one_service, service)
+                           for service in services}
+                for service, future in futures.items():
+                    health_status[service] = future.result()
+
+        for service, status in health_status.items():
+            if not status['active']:
                 logger.warning(f"Service {service} is not active!")
                 self.restart_service(service)
-        
-        self.results['tasks']['service_health'] = health_status
+
+        self._store_result('service_health', health_status)
         return health_status
     
     def restart_service(self, service: str) -> bool:
         """Attempt to restart a failed service."""
         logger.info(f"Attempting to restart service: {service}")
-        returncode, stdout, stderr = self.run_command(f"systemctl restart {service}")
+        returncode, stdout, stderr = self.run_command(["systemctl", "restart", service])
         
         if returncode == 0:
             logger.info(f"Successfully restarted {service}")
@@ -114,80 +331,207 @@ class MaintenanceTool:
             logger.error(f"Failed to restart {service}: {stderr}")
             return False
     
+    def _list_block_mounts(self) -> List[str]:
+        """Read real block-device mountpoints from /proc/self/mounts."""
+        mountpoints = []
+        try:
+            with open('/proc/self/mounts') as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 2 and fields[0].startswith('/dev/'):
+                        mountpoints.append(fields[1].replace('\\040', ' '))
+        except OSError as e:
+            logger.error(f"Failed to read mount table: {e}")
+        return mountpoints
+
     def check_disk_usage(self) -> Dict:
         """Monitor disk usage and clean up if necessary."""
         logger.info("Checking disk usage...")
         disk_info = {}
-        
-        for partition in psutil.disk_partitions():
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                usage_percent = (usage.used / usage.total) * 100
-                
-                disk_info[partition.mountpoint] = {
-                    'total_gb': round(usage.total / (1024**3), 2),
-                    'used_gb': round(usage.used / (1024**3), 2),
-                    'free_gb': round(usage.free / (1024**3), 2),
+
+        # Read the mount table once and statvfs each mount from a worker
+        # with a timeout, so a dead NFS/autofs mount can't hang the whole
+        # check; this also skips psutil's per-mount statfs probing.
+        mountpoints = self._list_block_mounts()
+        if not mountpoints:
+            self._store_result('disk_usage', disk_info)
+            return disk_info
+
+        executor = ThreadPoolExecutor(max_workers=min(8, len(mountpoints)))
+        try:
+            futures = {mp: executor.submit(os.statvfs, mp) for mp in mountpoints}
+
+            for mountpoint, future in futures.items():
+                try:
+                    stats = future.result(timeout=5)
+                except PermissionError:
+                    continue
+                except Exception as e:
+                    disk_info[mountpoint] = {'status': 'error', 'error': str(e)}
+                    continue
+
+                total = stats.f_blocks * stats.f_frsize
+                if total == 0:
+                    continue
+                used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+                free = stats.f_bavail * stats.f_frsize
+                usage_percent = (used / total) * 100
+
+                disk_info[mountpoint] = {
+                    'total_gb': _gb(total),
+                    'used_gb': _gb(used),
+                    'free_gb': _gb(free),
                     'usage_percent': round(usage_percent, 2),
                     'status': 'critical' if usage_percent > CONFIG['max_disk_usage_percent'] else 'ok'
                 }
-                
+
                 if usage_percent > CONFIG['max_disk_usage_percent']:
-                    logger.warning(f"High disk usage on {partition.mountpoint}: {usage_percent:.1f}%")
+                    logger.warning(f"High disk usage on {mountpoint}: {usage_percent:.1f}%")
                     self.cleanup_logs()
-                    
-            except PermissionError:
-                continue
-        
-        self.results['tasks']['disk_usage'] = disk_info
+        finally:
+            # Return without joining so a hung statvfs (dead NFS mount)
+            # can't stall this check beyond the result timeouts above.
+            # The worker is non-daemon, so interpreter exit still joins
+            # it; only the check itself is bounded.
+            executor.shutdown(wait=False)
+
+        self._store_result('disk_usage', disk_info)
         return disk_info
     
+    def _scan_old_logs(self, path: str, cutoff_ts: float) -> List[str]:
+        """Recursively collect log files older than cutoff_ts.
+
+        DirEntry.stat() reuses the data readdir already fetched, so each
+        file costs at most one stat, and the suffix check runs first so
+        non-log files skip the stat entirely.
+        """
+        old_files = []
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return old_files
+
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        old_files.extend(self._scan_old_logs(entry.path, cutoff_ts))
+                    elif (entry.name.endswith(LOG_SUFFIXES)
+                          and entry.stat(follow_symlinks=False).st_mtime < cutoff_ts):
+                        old_files.append(entry.path)
+                except OSError:
+                    continue
+
+        return old_files
+
+    def _unlink_batch(self, paths: List[str]) -> List[str]:
+        """Unlink many files from a worker pool, returning those removed.
+
+        Overlapping the synchronous unlink syscalls hides per-file
+        latency when thousands of rotated logs pile up on slow storage.
+        """
+        if not paths:
+            return []
+
+        def _unlink(path: str) -> Optional[str]:
+            try:
+                os.remove(path)
+                logger.info(f"Removed old log file: {path}")
+                return path
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return [path for path in executor.map(_unlink, paths) if path]
+
+    def _find_delete_logs(self, log_dir: str) -> Optional[List[str]]:
+        """Delete old rotated logs under log_dir with a single find exec.
+
+        find walks with getdents64/unlinkat directly, replacing the
+        per-file Python loop and its syscall round-trips; returns the
+        deleted paths, or None so the caller can fall back to the
+        Python implementation.
+        """
+        name_args = []
+        for suffix in LOG_SUFFIXES:
+            if name_args:
+                name_args.append("-o")
+            name_args += ["-name", f"*{suffix}"]
+
+        returncode, stdout, stderr = self.run_command(
+            ["find", log_dir, "-type", "f", "("] + name_args
+            + [")", "-mtime", f"+{CONFIG['max_log_age_days']}",
+               "-delete", "-print"]
+        )
+        if returncode != 0:
+            return None
+
+        cleaned = stdout.splitlines()
+        for path in cleaned:
+            logger.info(f"Removed old log file: {path}")
+        return cleaned
+
     def cleanup_logs(self) -> Dict:
         """Clean up old log files."""
+        # A critical-disk check can trigger cleanup while the scheduled
+        # cleanup task is already running; only the first caller works.
+        with self._cleanup_guard:
+            if self._logs_cleaned:
+                return self.results['tasks'].get('log_cleanup', {})
+            self._logs_cleaned = True
+
         logger.info("Cleaning up old logs...")
         cleanup_results = {}
-        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=CONFIG['max_log_age_days'])
-        
+        cutoff_ts = time.time() - CONFIG['max_log_age_days'] * 86400
+
         for log_dir in CONFIG['log_dirs']:
             if not os.path.exists(log_dir):
                 continue
-                
-            cleaned_files = []
-            for root, dirs, files in os.walk(log_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        file_mtime = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
-                        if file_mtime < cutoff_date and file.endswith(('.log', '.1', '.2', '.3')):
-                            os.remove(file_path)
-                            cleaned_files.append(file_path)
-                            logger.info(f"Removed old log file: {file_path}")
-                    except OSError:
-                        continue
-            
+
+            cleaned_files = self._find_delete_logs(log_dir)
+            if cleaned_files is None:
+                # find unavailable or failed; fall back to the Python walk
+                cleaned_files = self._unlink_batch(
+                    self._scan_old_logs(log_dir, cutoff_ts))
+
             cleanup_results[log_dir] = {
                 'files_removed': len(cleaned_files),
                 'files': cleaned_files
             }
         
         # Rotate journald logs
-        self.run_command("journalctl --vacuum-time=7d")
+        self.run_command(["journalctl", "--vacuum-time=7d"])
         
-        self.results['tasks']['log_cleanup'] = cleanup_results
+        self._store_result('log_cleanup', cleanup_results)
         return cleanup_results
     
+    def _mysql_connection(self):
+        """Get a connection from the shared pool, creating it lazily.
+
+        The pool amortizes the auth handshake across the health check and
+        the parallel OPTIMIZE workers; pool_size matches the OPTIMIZE
+        worker count plus the health check with headroom.
+        """
+        with self._pool_lock:
+            if self._mysql_pool is None:
+                self._mysql_pool = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name='maint', pool_size=4, autocommit=True,
+                    **CONFIG['mysql_config'])
+        return self._mysql_pool.get_connection()
+
     def check_mysql_health(self) -> Dict:
         """Check MySQL/Galera cluster health."""
         logger.info("Checking MySQL/Galera health...")
         mysql_status = {}
         
         try:
-            connection = mysql.connector.connect(**CONFIG['mysql_config'])
+            connection = self._mysql_connection()
             cursor = connection.cursor()
-            
-            # Check Galera cluster status
+
+            # Check Galera cluster status; iterate the cursor directly so
+            # rows stream instead of being materialized by fetchall
             cursor.execute("SHOW STATUS LIKE 'wsrep_%'")
-            galera_status = {row[0]: row[1] for row in cursor.fetchall()}
+            galera_status = {name: value for name, value in cursor}
             
             # Key metrics
             mysql_status = {
@@ -200,7 +544,9 @@ class MaintenanceTool:
             
             # Optimize tables if needed
             if mysql_status['status'] == 'healthy':
-                self.optimize_mysql_tables(cursor)
+                self.optimize_mysql_tables(
+                    cursor, galera_active=galera_status.get('wsrep_ready') == 'ON'
+                )
             
             connection.close()
             
@@ -208,23 +554,56 @@ class MaintenanceTool:
             logger.error(f"MySQL connection error: {e}")
             mysql_status = {'status': 'error', 'error': str(e)}
         
-        self.results['tasks']['mysql_health'] = mysql_status
+        self._store_result('mysql_health', mysql_status)
         return mysql_status
     
-    def optimize_mysql_tables(self, cursor) -> None:
-        """Optimize MySQL tables for better performance."""
-        logger.info("Optimizing MySQL tables...")
-        
-        # Get all tables
-        cursor.execute("SHOW TABLES")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        for table in tables:
+    def _optimize_one_table(self, table: str) -> None:
+        """Run OPTIMIZE TABLE on a pooled connection with bounded lock waits."""
+        try:
+            connection = self._mysql_connection()
             try:
+                cursor = connection.cursor()
+                cursor.execute("SET SESSION lock_wait_timeout = 60")
                 cursor.execute(f"OPTIMIZE TABLE {table}")
+                cursor.fetchall()
                 logger.debug(f"Optimized table: {table}")
-            except mysql.connector.Error as e:
-                logger.warning(f"Failed to optimize table {table}: {e}")
+            finally:
+                connection.close()
+        except mysql.connector.Error as e:
+            logger.warning(f"Failed to optimize table {table}: {e}")
+
+    def optimize_mysql_tables(self, cursor, galera_active: bool = False) -> None:
+        """Optimize MySQL tables for better performance.
+
+        Under Galera, OPTIMIZE on an InnoDB table replicates in Total
+        Order Isolation and stalls the whole cluster, so InnoDB tables
+        are skipped when the node is in an active cluster. The remaining
+        tables are optimized one query at a time from a small worker
+        pool, each on its own connection.
+        """
+        logger.info("Optimizing MySQL tables...")
+
+        # Allow the metadata query extra time on instances with huge
+        # table counts, then stream rows off the cursor and hand each
+        # eligible table to the pool as it arrives — no O(N) fetchall
+        # buffering, and the first OPTIMIZE starts immediately.
+        cursor.execute("SET SESSION max_statement_time = 300")
+        cursor.execute(
+            "SELECT TABLE_NAME, ENGINE FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE()"
+        )
+
+        submitted = 0
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for table, engine in cursor:
+                if galera_active and engine == 'InnoDB':
+                    logger.debug(f"Skipping InnoDB table under Galera: {table}")
+                    continue
+                executor.submit(self._optimize_one_table, table)
+                submitted += 1
+
+        if not submitted:
+            logger.info("No tables eligible for OPTIMIZE")
     
     def check_network_connectivity(self) -> Dict:
         """Check network connectivity to critical services."""
@@ -242,96 +621,183 @@ class MaintenanceTool:
             ('jumphost.lab.local', 3000)
         ]
         
+        # Resolve each hostname once (via the module LRU), fire all
+        # connects non-blocking and wait for the whole batch in select —
+        # wall time is one timeout instead of the sum, with no nc
+        # processes spawned.
+        pending = {}
+
         for host, port in hosts_to_check:
-            returncode, stdout, stderr = self.run_command(f"nc -z -w5 {host} {port}")
-            connectivity[f"{host}:{port}"] = {
-                'reachable': returncode == 0,
-                'status': 'ok' if returncode == 0 else 'failed'
-            }
-        
-        self.results['tasks']['network_connectivity'] = connectivity
+            key = f"{host}:{port}"
+
+            addr = _resolve(host)
+            if addr is None:
+                connectivity[key] = {'reachable': False, 'status': 'failed'}
+                continue
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            err = sock.connect_ex((addr, port))
+            if err == 0:
+                connectivity[key] = {'reachable': True, 'status': 'ok'}
+                sock.close()
+            elif err in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                pending[sock] = key
+            else:
+                connectivity[key] = {'reachable': False, 'status': 'failed'}
+                sock.close()
+
+        deadline = time.monotonic() + 5.0
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _, writable, _ = select.select([], list(pending), [], remaining)
+            for sock in writable:
+                key = pending.pop(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                connectivity[key] = {
+                    'reachable': err == 0,
+                    'status': 'ok' if err == 0 else 'failed'
+                }
+                sock.close()
+
+        # Anything still pending at the deadline is unreachable
+        for sock, key in pending.items():
+            connectivity[key] = {'reachable': False, 'status': 'failed'}
+            sock.close()
+
+        self._store_result('network_connectivity', connectivity)
         return connectivity
     
+    def _check_one_cert(self, cert_path: str, now: datetime.datetime) -> Dict:
+        """Check one certificate's expiry, parsing in-process when possible.
+
+        The cryptography library reads the notAfter field without forking
+        openssl and without the locale-sensitive %Z strptime; failing
+        that, the hand-rolled DER walk in _pem_not_after covers the
+        common case, with the openssl subprocess as a last resort.
+        """
+        if not os.path.exists(cert_path):
+            return {'status': 'not_found'}
+
+        expiry_date = None
+        if x509 is not None:
+            try:
+                with open(cert_path, 'rb') as f:
+                    cert = x509.load_pem_x509_certificate(f.read())
+                expiry_date = getattr(cert, 'not_valid_after_utc', None)
+                if expiry_date is None:
+                    expiry_date = cert.not_valid_after.replace(
+                        tzinfo=datetime.timezone.utc)
+            except Exception as e:
+                return {'status': 'read_error', 'error': str(e)}
+        else:
+            try:
+                with open(cert_path, 'rb') as f:
+                    expiry_date = _pem_not_after(f.read())
+            except OSError as e:
+                return {'status': 'read_error', 'error': str(e)}
+
+        if expiry_date is not None:
+            days_until_expiry = (expiry_date - now).days
+        else:
+            returncode, stdout, stderr = self.run_command(
+                ["openssl", "x509", "-enddate", "-noout", "-in", cert_path]
+            )
+            if returncode != 0:
+                return {'status': 'read_error', 'error': stderr}
+
+            expiry_str = stdout.replace('notAfter=', '').strip()
+            try:
+                expiry_date = datetime.datetime.strptime(
+                    expiry_str, '%b %d %H:%M:%S %Y %Z')
+            except ValueError:
+                return {'status': 'parse_error', 'error': 'Could not parse date'}
+            # openssl prints GMT; compare against the naive UTC timestamp
+            days_until_expiry = (expiry_date - now.replace(tzinfo=None)).days
+
+        if days_until_expiry < 30:
+            logger.warning(f"Certificate {cert_path} expires in {days_until_expiry} days!")
+
+        return {
+            'expiry_date': expiry_date.isoformat(),
+            'days_until_expiry': days_until_expiry,
+            'status': 'critical' if days_until_expiry < 30 else 'ok'
+        }
+
     def check_certificate_expiry(self) -> Dict:
         """Check SSL certificate expiration dates."""
         logger.info("Checking certificate expiry...")
         cert_status = {}
-        
+
         cert_paths = [
             '/etc/ssl/certs/telecom-lab.pem',
             '/opt/ca/ca.pem',
             '/etc/wireguard/server.crt'
         ]
-        
-        for cert_path in cert_paths:
-            if os.path.exists(cert_path):
-                returncode, stdout, stderr = self.run_command(
-                    f"openssl x509 -enddate -noout -in {cert_path}"
-                )
-                
-                if returncode == 0:
-                    # Parse expiry date
-                    expiry_str = stdout.replace('notAfter=', '').strip()
-                    try:
-                        expiry_date = datetime.datetime.strptime(expiry_str, '%b %d %H:%M:%S %Y %Z')
-                        days_until_expiry = (expiry_date - datetime.datetime.now()).days
-                        
-                        cert_status[cert_path] = {
-                            'expiry_date': expiry_date.isoformat(),
-                            'days_until_expiry': days_until_expiry,
-                            'status': 'critical' if days_until_expiry < 30 else 'ok'
-                        }
-                        
-                        if days_until_expiry < 30:
-                            logger.warning(f"Certificate {cert_path} expires in {days_until_expiry} days!")
-                            
-                    except ValueError:
-                        cert_status[cert_path] = {'status': 'parse_error', 'error': 'Could not parse date'}
-                else:
-                    cert_status[cert_path] = {'status': 'read_error', 'error': stderr}
-            else:
-                cert_status[cert_path] = {'status': 'not_found'}
-        
-        self.results['tasks']['certificate_expiry'] = cert_status
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with ThreadPoolExecutor(max_workers=len(cert_paths)) as executor:
+            futures = {path: executor.submit(self._check_one_cert, path, now)
+                       for path in cert_paths}
+            for cert_path, future in futures.items():
+                cert_status[cert_path] = future.result()
+
+        self._store_result('certificate_expiry', cert_status)
         return cert_status
     
+    def _latest_backup(self, directory: str, prefix: str,
+                       suffix: str) -> Optional[Tuple[str, float]]:
+        """Find the newest matching backup file in one scandir pass.
+
+        Tracks the running max ctime from the DirEntry stats cached by
+        readdir instead of globbing and re-statting every match.
+        """
+        latest = None
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not (entry.name.startswith(prefix)
+                            and entry.name.endswith(suffix)):
+                        continue
+                    ctime = entry.stat().st_ctime
+                    if latest is None or ctime > latest[1]:
+                        latest = (entry.path, ctime)
+        except OSError:
+            return None
+        return latest
+
     def backup_verification(self) -> Dict:
         """Verify recent backups exist and are valid."""
         logger.info("Verifying backups...")
         backup_status = {}
-        
+
         if os.path.exists(CONFIG['backup_dir']):
-            # Check for recent MySQL backup
-            mysql_backups = list(Path(CONFIG['backup_dir']).glob('mysql/full_backup_*.sql.gz'))
-            if mysql_backups:
-                latest_mysql = max(mysql_backups, key=os.path.getctime)
-                backup_age = datetime.datetime.now() - datetime.datetime.fromtimestamp(os.path.getctime(latest_mysql))
-                
-                backup_status['mysql'] = {
-                    'latest_backup': str(latest_mysql),
-                    'age_hours': round(backup_age.total_seconds() / 3600, 2),
-                    'status': 'ok' if backup_age.days < 1 else 'old'
-                }
-            else:
-                backup_status['mysql'] = {'status': 'missing'}
-            
-            # Check for config backup
-            config_backups = list(Path(CONFIG['backup_dir']).glob('configs/configs_*.tar.gz'))
-            if config_backups:
-                latest_config = max(config_backups, key=os.path.getctime)
-                backup_age = datetime.datetime.now() - datetime.datetime.fromtimestamp(os.path.getctime(latest_config))
-                
-                backup_status['configs'] = {
-                    'latest_backup': str(latest_config),
-                    'age_hours': round(backup_age.total_seconds() / 3600, 2),
-                    'status': 'ok' if backup_age.days < 1 else 'old'
-                }
-            else:
-                backup_status['configs'] = {'status': 'missing'}
+            now_ts = time.time()
+
+            checks = {
+                'mysql': ('mysql', 'full_backup_', '.sql.gz'),
+                'configs': ('configs', 'configs_', '.tar.gz')
+            }
+
+            for name, (subdir, prefix, suffix) in checks.items():
+                latest = self._latest_backup(
+                    os.path.join(CONFIG['backup_dir'], subdir), prefix, suffix)
+
+                if latest:
+                    age_hours = (now_ts - latest[1]) / 3600
+                    backup_status[name] = {
+                        'latest_backup': latest[0],
+                        'age_hours': round(age_hours, 2),
+                        'status': 'ok' if age_hours < 24 else 'old'
+                    }
+                else:
+                    backup_status[name] = {'status': 'missing'}
         else:
             backup_status = {'status': 'backup_dir_missing'}
-        
-        self.results['tasks']['backup_verification'] = backup_status
+
+        self._store_result('backup_verification', backup_status)
         return backup_status
     
     def performance_metrics(self) -> Dict:
@@ -339,8 +805,10 @@ class MaintenanceTool:
         logger.info("Collecting performance metrics...")
         metrics = {}
         
-        # CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # Short explicit window: an interval=None reading taken
+        # milliseconds after startup reports a meaningless 0.0 under the
+        # concurrent runner, and 100 ms overlaps the other checks anyway
+        cpu_percent = psutil.cpu_percent(interval=0.1)
         
         # Memory usage
         memory = psutil.virtual_memory()
@@ -354,8 +822,8 @@ class MaintenanceTool:
         metrics = {
             'cpu_percent': cpu_percent,
             'memory': {
-                'total_gb': round(memory.total / (1024**3), 2),
-                'used_gb': round(memory.used / (1024**3), 2),
+                'total_gb': _gb(memory.total),
+                'used_gb': _gb(memory.used),
                 'percent': memory.percent
             },
             'load_average': {
@@ -372,27 +840,60 @@ class MaintenanceTool:
             'uptime_hours': round(psutil.boot_time() / 3600, 2)
         }
         
-        self.results['tasks']['performance_metrics'] = metrics
+        self._store_result('performance_metrics', metrics)
         return metrics
     
+    def _flatten_metrics(self, prefix: str, value, flat: Dict[str, float]) -> None:
+        """Collect numeric leaves of a result dict as gauge name/value pairs."""
+        if isinstance(value, dict):
+            for key, sub in value.items():
+                self._flatten_metrics(f"{prefix}_{key}", sub, flat)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[re.sub(r'[^a-zA-Z0-9_]', '_', prefix)] = value
+
     def send_metrics_to_prometheus(self) -> bool:
-        """Send maintenance metrics to Prometheus."""
+        """Push the collected metrics snapshot to the Pushgateway.
+
+        Every numeric field already sitting in the results dict becomes
+        a gauge in one registry, pushed in a single HTTP request — no
+        re-probing and no per-metric round-trips.
+        """
+        if prometheus_client is None:
+            logger.warning("prometheus_client not installed, skipping metrics push")
+            return False
+
         try:
-            # This would typically use Prometheus pushgateway
-            # For now, just log the metrics
-            logger.info("Metrics would be sent to Prometheus here")
+            registry = prometheus_client.CollectorRegistry()
+
+            flat: Dict[str, float] = {}
+            with self._results_lock:
+                self._flatten_metrics('maintenance', self.results['tasks'], flat)
+
+            for name, value in flat.items():
+                prometheus_client.Gauge(
+                    name, 'Maintenance task metric', registry=registry).set(value)
+
+            prometheus_client.push_to_gateway(
+                CONFIG['pushgateway_url'], job='maintenance', registry=registry)
+            logger.info(f"Pushed {len(flat)} metrics to the Pushgateway")
             return True
         except Exception as e:
             logger.error(f"Failed to send metrics to Prometheus: {e}")
             return False
     
+    def render_results(self) -> str:
+        """Encode the results dict once; callers share the payload."""
+        with self._results_lock:
+            return json.dumps(self.results, indent=2)
+
     def generate_report(self) -> str:
         """Generate comprehensive maintenance report."""
-        report_path = f"/tmp/maintenance_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
+        report_path = f"/tmp/maintenance_report_{time.strftime('%Y%m%d_%H%M%S')}.json"
+
+        self.report_payload = self.render_results()
         with open(report_path, 'w') as f:
-            json.dump(self.results, f, indent=2)
-        
+            f.write(self.report_payload)
+
         logger.info(f"Maintenance report generated: {report_path}")
         return report_path
     
@@ -401,15 +902,25 @@ class MaintenanceTool:
         logger.info("Starting full maintenance cycle...")
         
         try:
-            self.check_service_health()
-            self.check_disk_usage()
-            self.cleanup_logs()
-            self.check_mysql_health()
-            self.check_network_connectivity()
-            self.check_certificate_expiry()
-            self.backup_verification()
-            self.performance_metrics()
-            
+            # The checks hit disjoint resources (systemd, filesystem,
+            # MySQL, network), so run them concurrently; results land in
+            # self.results['tasks'] under the lock.
+            checks = [
+                self.check_service_health,
+                self.check_disk_usage,
+                self.cleanup_logs,
+                self.check_mysql_health,
+                self.check_network_connectivity,
+                self.check_certificate_expiry,
+                self.backup_verification,
+                self.performance_metrics,
+            ]
+
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                for future in [executor.submit(check) for check in checks]:
+                    future.result()
+
+
             # Generate summary
             self.results['summary'] = {
                 'total_tasks': len(self.results['tasks']),
@@ -468,8 +979,8 @@ def main():
     else:
         maintenance.run_full_maintenance()
     
-    # Print results
-    print(json.dumps(maintenance.results, indent=2))
+    # Print results, reusing the payload generate_report already encoded
+    print(maintenance.report_payload or maintenance.render_results())
     
     return 0
 
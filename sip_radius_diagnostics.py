@@ -3,37 +3,122 @@
 sip_radius_diagnostics.py - Advanced SIP and RADIUS diagnostics for telecom-lab-ha3
 """
 
+import os
+import errno
 import socket
+import select
+import struct
 import subprocess
+import hashlib
 import json
 import time
+import asyncio
 import logging
 import argparse
-from datetime import datetime
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/sip-radius-diagnostics.log'),
-        logging.StreamHandler()
-    ]
-)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+def _tune_ephemeral(sock: socket.socket) -> socket.socket:
+    """Relax local-port reuse on a short-lived client socket.
+
+    Scheduled runs leave TIME_WAIT entries behind; SO_REUSEADDR plus
+    IP_BIND_ADDRESS_NO_PORT (Linux >= 4.2, deferred ephemeral port
+    selection) keep repeated probes from hitting EADDRNOTAVAIL.
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, 24, 1)  # IP_BIND_ADDRESS_NO_PORT
+    except OSError:
+        pass
+    return sock
+
+def _render_json(obj: Dict) -> bytes:
+    """Pretty-print a results dict as JSON bytes, via orjson when present."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
 class TelecomDiagnostics:
+    # Static OPTIONS skeleton; only the target, hostname and timestamp
+    # vary per probe, so bytes %-formatting fills them without building
+    # a pile of intermediate strings
+    _SIP_OPTIONS_TMPL = (
+        b"OPTIONS sip:%s SIP/2.0\r\n"
+        b"Via: SIP/2.0/UDP %s:5060;branch=z9hG4bK-diag-%d\r\n"
+        b"Max-Forwards: 70\r\n"
+        b"To: <sip:%s>\r\n"
+        b"From: <sip:diagnostic@%s>;tag=diag123\r\n"
+        b"Call-ID: diagnostic-%d@%s\r\n"
+        b"CSeq: 1 OPTIONS\r\n"
+        b"Contact: <sip:diagnostic@%s>\r\n"
+        b"User-Agent: TelecomDiagnostics/1.0\r\n"
+        b"Content-Length: 0\r\n\r\n"
+    )
+
     def __init__(self):
+        # time.strftime is cheaper than datetime.now().isoformat() and
+        # keeps the same wall-clock format in the report
+        t = time.time()
         self.results = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': (time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(t))
+                          + f'.{int(t % 1 * 1e6):06d}'),
             'hostname': socket.gethostname(),
             'tests': {}
         }
+        # gethostname is a syscall; resolve once and reuse everywhere
+        self._hostname = self.results['hostname']
+        self._hostname_b = self._hostname.encode()
+        # Per-secret MD5 contexts primed with the shared secret; copied
+        # per packet so the secret is only ever hashed once
+        self._radius_md5_ctx = {}
+        # One reusable UDP socket per worker thread: probes reuse the
+        # descriptor across targets, and thread-locality keeps the
+        # concurrent comprehensive run from stealing each other's replies
+        self._udp_local = threading.local()
+        self._udp_socks = []
+        self._udp_socks_lock = threading.Lock()
+        # Result-key strings per target, built once per target
+        self._target_key_cache = {}
+
+    def target_keys(self, target: str) -> Tuple[str, str]:
+        """Return the (sip, radius) result keys for a target, cached."""
+        keys = self._target_key_cache.get(target)
+        if keys is None:
+            slug = target.replace('.', '_')
+            keys = (f"sip_test_{slug}", f"radius_test_{slug}")
+            self._target_key_cache[target] = keys
+        return keys
+
+    def _udp_socket(self) -> socket.socket:
+        """Return this thread's UDP socket, creating it on first use."""
+        sock = getattr(self._udp_local, 'sock', None)
+        if sock is None:
+            sock = _tune_ephemeral(
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM))
+            self._udp_local.sock = sock
+            with self._udp_socks_lock:
+                self._udp_socks.append(sock)
+        return sock
+
+    def __del__(self):
+        for sock in getattr(self, '_udp_socks', []):
+            try:
+                sock.close()
+            except OSError:
+                pass
         
     def test_sip_connectivity(self, host: str = '127.0.0.1', port: int = 5060) -> Dict:
         """Test SIP server connectivity and basic response"""
-        logger.info(f"Testing SIP connectivity to {host}:{port}")
+        logger.info("Testing SIP connectivity to %s:%d", host, port)
         
         result = {
             'test': 'sip_connectivity',
@@ -44,72 +129,146 @@ class TelecomDiagnostics:
         }
         
         try:
-            # TCP connectivity test
+            # TCP connectivity test; create_connection also resolves
+            # dual-stack targets correctly should the lab go IPv6
             start_time = time.time()
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            tcp_result = sock.connect_ex((host, port))
-            sock.close()
-            
-            if tcp_result == 0:
+            try:
+                socket.create_connection((host, port), timeout=5).close()
                 result['details']['tcp_connectivity'] = 'OK'
-            else:
+            except OSError:
                 result['details']['tcp_connectivity'] = 'FAILED'
                 result['status'] = 'failed'
                 return result
             
             # UDP SIP OPTIONS test
-            sip_message = (
-                f"OPTIONS sip:{host} SIP/2.0\r\n"
-                f"Via: SIP/2.0/UDP {socket.gethostname()}:5060;branch=z9hG4bK-diag-{int(time.time())}\r\n"
-                f"Max-Forwards: 70\r\n"
-                f"To: <sip:{host}>\r\n"
-                f"From: <sip:diagnostic@{socket.gethostname()}>;tag=diag123\r\n"
-                f"Call-ID: diagnostic-{int(time.time())}@{socket.gethostname()}\r\n"
-                f"CSeq: 1 OPTIONS\r\n"
-                f"Contact: <sip:diagnostic@{socket.gethostname()}>\r\n"
-                f"User-Agent: TelecomDiagnostics/1.0\r\n"
-                f"Content-Length: 0\r\n\r\n"
+            host_b = host.encode()
+            hostname_b = self._hostname_b
+            now = int(time.time())
+            sip_message = self._SIP_OPTIONS_TMPL % (
+                host_b, hostname_b, now, host_b, hostname_b,
+                now, hostname_b, hostname_b
             )
-            
-            udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            udp_sock.settimeout(5)
-            udp_sock.sendto(sip_message.encode(), (host, port))
-            
+
+            udp_sock = self._udp_socket()
+            udp_sock.sendto(sip_message, (host, port))
+
+            # The reply may arrive from a different representation of
+            # the target (hostname vs IP), so resolve once and match the
+            # source address against that; if resolution fails, accept
+            # any sender rather than discard valid replies
             try:
-                response, addr = udp_sock.recvfrom(4096)
+                expected_addr = socket.getaddrinfo(
+                    host, port, socket.AF_INET, socket.SOCK_DGRAM)[0][4][0]
+            except OSError:
+                expected_addr = None
+
+            # Short polled wait with one retransmit halfway through the
+            # window: dead endpoints fail in ~3 s instead of the old 5 s
+            # blocking recvfrom, and UDP loss gets a second chance. The
+            # deadline loop means a discarded stale datagram from this
+            # reused socket costs neither the retransmit nor the window.
+            response = None
+            deadline = time.monotonic() + 3.0
+            retransmit_at = deadline - 1.5
+            retransmitted = False
+            while response is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not retransmitted and time.monotonic() >= retransmit_at:
+                    udp_sock.sendto(sip_message, (host, port))
+                    retransmitted = True
+                wait = min(remaining,
+                           1.5 if retransmitted else retransmit_at - time.monotonic())
+                ready, _, _ = select.select([udp_sock], [], [], max(wait, 0))
+                if ready:
+                    data, addr = udp_sock.recvfrom(4096)
+                    if expected_addr is not None and addr[0] != expected_addr:
+                        # stale datagram from an earlier probe
+                        continue
+                    response = data
+
+            if response is not None:
                 end_time = time.time()
                 response_time = (end_time - start_time) * 1000
-                
+
                 result['response_time'] = round(response_time, 2)
-                result['details']['sip_response'] = response.decode('utf-8', errors='ignore')[:200]
-                
+                # Slice before decoding so the codec only sees the 200
+                # bytes that end up in the report
+                result['details']['sip_response'] = response[:200].decode('utf-8', errors='ignore')
+
                 if b'SIP/2.0' in response:
                     result['status'] = 'passed'
                     result['details']['sip_status'] = 'Valid SIP response received'
                 else:
                     result['status'] = 'warning'
                     result['details']['sip_status'] = 'Invalid SIP response'
-                    
-            except socket.timeout:
+            else:
                 result['status'] = 'failed'
                 result['details']['sip_status'] = 'SIP response timeout'
-                
-            udp_sock.close()
-            
+
         except Exception as e:
             result['status'] = 'error'
             result['details']['error'] = str(e)
-            logger.error(f"SIP test error: {e}")
+            logger.error("SIP test error: %s", e)
             
         return result
     
-    def test_radius_auth(self, host: str = '127.0.0.1', port: int = 1812, 
+    def _build_access_request(self, username: str, password: str,
+                              secret: str) -> Tuple[bytes, int]:
+        """Build a RADIUS Access-Request packet per RFC 2865.
+
+        The User-Password attribute is the password padded to a 16-byte
+        multiple and XORed blockwise with MD5(secret + authenticator),
+        chaining each ciphertext block into the next digest.
+        """
+        ident = os.urandom(1)[0]
+        authenticator = os.urandom(16)
+
+        base_ctx = self._radius_md5_ctx.get(secret)
+        if base_ctx is None:
+            # usedforsecurity lets OpenSSL pick its fast MD5 even under
+            # FIPS policies; obfuscation here is a wire format, not auth
+            try:
+                base_ctx = hashlib.new('md5', secret.encode(),
+                                       usedforsecurity=False)
+            except TypeError:
+                base_ctx = hashlib.new('md5', secret.encode())
+            self._radius_md5_ctx[secret] = base_ctx
+
+        padded = password.encode()
+        padded += b'\x00' * (-len(padded) % 16)
+        if not padded:
+            padded = b'\x00' * 16
+
+        obfuscated = b''
+        prev = authenticator
+        for i in range(0, len(padded), 16):
+            ctx = base_ctx.copy()
+            ctx.update(prev)
+            # XOR the whole 16-byte block as one int instead of a
+            # Python-level loop over the bytes
+            block = (int.from_bytes(padded[i:i + 16], 'big')
+                     ^ int.from_bytes(ctx.digest(), 'big')).to_bytes(16, 'big')
+            obfuscated += block
+            prev = block
+
+        user_bytes = username.encode()
+        attrs = (
+            struct.pack('!BB', 1, 2 + len(user_bytes)) + user_bytes +
+            struct.pack('!BB', 2, 2 + len(obfuscated)) + obfuscated +
+            struct.pack('!BBI', 5, 6, 0)  # NAS-Port = 0, as radtest sent
+        )
+
+        header = struct.pack('!BBH', 1, ident, 20 + len(attrs)) + authenticator
+        return header + attrs, ident
+
+    def test_radius_auth(self, host: str = '127.0.0.1', port: int = 1812,
                         username: str = 'testuser', password: str = 'testpass',
                         secret: str = 'testing123') -> Dict:
         """Test RADIUS authentication"""
-        logger.info(f"Testing RADIUS authentication to {host}:{port}")
-        
+        logger.info("Testing RADIUS authentication to %s:%d", host, port)
+
         result = {
             'test': 'radius_auth',
             'target': f"{host}:{port}",
@@ -118,51 +277,48 @@ class TelecomDiagnostics:
             'response_time': None,
             'details': {}
         }
-        
+
+        # Access-Request response codes of interest
+        code_names = {2: 'Access-Accept', 3: 'Access-Reject', 11: 'Access-Challenge'}
+
         try:
-            # Use radtest command if available
+            # Build and send the Access-Request in-process; no radtest
+            # fork, so the whole test is one network round-trip
+            packet, ident = self._build_access_request(username, password, secret)
+
             start_time = time.time()
-            cmd = [
-                'radtest', username, password, host, '0', secret
-            ]
-            
-            process = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=10
-            )
-            
-            end_time = time.time()
-            result['response_time'] = round((end_time - start_time) * 1000, 2)
-            result['details']['command_output'] = process.stdout
-            result['details']['command_error'] = process.stderr
-            result['details']['return_code'] = process.returncode
-            
-            if 'Access-Accept' in process.stdout:
-                result['status'] = 'passed'
-                result['details']['auth_result'] = 'Access-Accept'
-            elif 'Access-Reject' in process.stdout:
-                result['status'] = 'passed'  # Server responded, auth rejected
-                result['details']['auth_result'] = 'Access-Reject'
-            elif process.returncode == 0:
-                result['status'] = 'passed'
-                result['details']['auth_result'] = 'Server responded'
-            else:
+            sock = _tune_ephemeral(
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM))
+            sock.settimeout(2)
+            try:
+                sock.sendto(packet, (host, port))
+                response, addr = sock.recvfrom(4096)
+            finally:
+                sock.close()
+
+            result['response_time'] = round((time.time() - start_time) * 1000, 2)
+
+            if len(response) < 20 or response[1] != ident:
                 result['status'] = 'failed'
-                result['details']['auth_result'] = 'No response or error'
-                
-        except subprocess.TimeoutExpired:
+                result['details']['auth_result'] = 'Malformed or mismatched response'
+                return result
+
+            code = response[0]
+            auth_result = code_names.get(code, f'Code {code}')
+            result['details']['auth_result'] = auth_result
+
+            # Any well-formed answer means the server is alive; a Reject
+            # still proves the auth path works
+            result['status'] = 'passed' if code in code_names else 'warning'
+
+        except socket.timeout:
             result['status'] = 'failed'
             result['details']['auth_result'] = 'Timeout'
-        except FileNotFoundError:
-            result['status'] = 'error'
-            result['details']['auth_result'] = 'radtest command not found'
         except Exception as e:
             result['status'] = 'error'
             result['details']['error'] = str(e)
-            logger.error(f"RADIUS test error: {e}")
-            
+            logger.error("RADIUS test error: %s", e)
+
         return result
     
     def test_galera_cluster(self) -> Dict:
@@ -176,38 +332,40 @@ class TelecomDiagnostics:
         }
         
         try:
-            # Check cluster size
-            cmd = ['mysql', '-u', 'root', '-e', "SHOW STATUS LIKE 'wsrep_cluster_size';"]
-            process = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            
+            # Read both status variables in one mysql invocation — one
+            # fork and one auth round-trip instead of two; -N -B gives
+            # headerless tab-separated output
+            cmd = ['mysql', '-u', 'root', '-N', '-B', '-e',
+                   "SHOW STATUS WHERE Variable_name IN "
+                   "('wsrep_cluster_size','wsrep_local_state_comment');"]
+            # The two values are plain ASCII; keep stdout as bytes and
+            # skip the text-mode decode pass
+            process = subprocess.run(cmd, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, timeout=5)
+
             if process.returncode == 0:
-                lines = process.stdout.strip().split('\n')
-                for line in lines:
-                    if 'wsrep_cluster_size' in line:
-                        cluster_size = int(line.split('\t')[1])
+                # partition allocates only the value slice, and matching
+                # on the prefix avoids building an intermediate dict
+                for line in process.stdout.splitlines():
+                    if line.startswith(b'wsrep_cluster_size'):
+                        cluster_size = int(line.partition(b'\t')[2])
                         result['details']['cluster_size'] = cluster_size
-                        
+
                         if cluster_size == 3:
                             result['details']['cluster_size_status'] = 'OK'
                         else:
                             result['details']['cluster_size_status'] = f'WARNING: Expected 3, got {cluster_size}'
-            
-            # Check local state
-            cmd = ['mysql', '-u', 'root', '-e', "SHOW STATUS LIKE 'wsrep_local_state_comment';"]
-            process = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            
-            if process.returncode == 0:
-                lines = process.stdout.strip().split('\n')
-                for line in lines:
-                    if 'wsrep_local_state_comment' in line:
-                        state = line.split('\t')[1]
+
+                    elif line.startswith(b'wsrep_local_state_comment'):
+                        state = line.partition(b'\t')[2].decode()
                         result['details']['local_state'] = state
-                        
+
                         if state == 'Synced':
                             result['details']['local_state_status'] = 'OK'
                         else:
                             result['details']['local_state_status'] = f'WARNING: State is {state}'
-            
+
+
             # Determine overall status
             cluster_ok = result['details'].get('cluster_size', 0) == 3
             state_ok = result['details'].get('local_state') == 'Synced'
@@ -222,7 +380,7 @@ class TelecomDiagnostics:
         except Exception as e:
             result['status'] = 'error'
             result['details']['error'] = str(e)
-            logger.error(f"Galera test error: {e}")
+            logger.error("Galera test error: %s", e)
             
         return result
     
@@ -246,22 +404,40 @@ class TelecomDiagnostics:
         
         passed_count = 0
         total_count = len(endpoints)
-        
-        for service, (host, port, path) in endpoints.items():
+
+        def _probe(service: str, host: str, port: int) -> Tuple[str, str]:
+            # Non-blocking connect: on loopback the handshake completes
+            # in microseconds, so a short select beats waiting out a
+            # full blocking-connect timeout on dead ports
             try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(3)
-                connection_result = sock.connect_ex((host, port))
-                sock.close()
-                
-                if connection_result == 0:
-                    result['details'][f'{service}_port'] = 'OK'
-                    passed_count += 1
-                else:
-                    result['details'][f'{service}_port'] = 'FAILED'
-                    
+                sock = _tune_ephemeral(
+                    socket.socket(socket.AF_INET, socket.SOCK_STREAM))
+                try:
+                    sock.setblocking(False)
+                    err = sock.connect_ex((host, port))
+                    if err in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        _, writable, _ = select.select([], [sock], [], 0.3)
+                        if writable:
+                            err = sock.getsockopt(socket.SOL_SOCKET,
+                                                  socket.SO_ERROR)
+                        else:
+                            return service, 'FAILED'
+                    return service, 'OK' if err in (0, errno.EISCONN) else 'FAILED'
+                finally:
+                    sock.close()
             except Exception as e:
-                result['details'][f'{service}_port'] = f'ERROR: {e}'
+                return service, f'ERROR: {e}'
+
+        # Probe all endpoints concurrently; the threads just block in
+        # select, so wall time is the slowest probe instead of the sum
+        with ThreadPoolExecutor(max_workers=total_count) as executor:
+            probes = [executor.submit(_probe, service, host, port)
+                      for service, (host, port, path) in endpoints.items()]
+            for probe in probes:
+                service, status = probe.result()
+                result['details'][f'{service}_port'] = status
+                if status == 'OK':
+                    passed_count += 1
         
         # Determine overall status
         if passed_count == total_count:
@@ -275,6 +451,19 @@ class TelecomDiagnostics:
         
         return result
     
+    async def _gather_tests(self, tests) -> List[Tuple[str, Dict]]:
+        """Await all (name, callable) tests concurrently on one loop.
+
+        The individual tests stay synchronous — each already drives its
+        sockets and subprocesses with short timeouts — so they run in
+        worker threads while a single event loop reaps every in-flight
+        test, preserving result order.
+        """
+        async def _run(name: str, test) -> Tuple[str, Dict]:
+            return name, await asyncio.to_thread(test)
+
+        return await asyncio.gather(*[_run(name, test) for name, test in tests])
+
     def run_comprehensive_test(self, targets: Optional[List[str]] = None) -> Dict:
         """Run comprehensive diagnostic tests"""
         logger.info("Starting comprehensive diagnostic tests")
@@ -282,27 +471,21 @@ class TelecomDiagnostics:
         if not targets:
             targets = ['127.0.0.1', '192.168.56.254']  # localhost and VIP
         
-        # SIP tests
-        for target in targets:
-            test_name = f"sip_test_{target.replace('.', '_')}"
-            self.results['tests'][test_name] = self.test_sip_connectivity(target)
-        
-        # RADIUS tests  
-        for target in targets:
-            test_name = f"radius_test_{target.replace('.', '_')}"
-            self.results['tests'][test_name] = self.test_radius_auth(target)
-        
-        # Galera cluster test
-        self.results['tests']['galera_cluster'] = self.test_galera_cluster()
-        
-        # Monitoring endpoints test
-        self.results['tests']['monitoring_endpoints'] = self.test_monitoring_endpoints()
-        
-        # Summary
-        passed = sum(1 for test in self.results['tests'].values() if test['status'] == 'passed')
-        warning = sum(1 for test in self.results['tests'].values() if test['status'] == 'warning')
-        failed = sum(1 for test in self.results['tests'].values() if test['status'] == 'failed')
-        error = sum(1 for test in self.results['tests'].values() if test['status'] == 'error')
+        # Every test owns its sockets/subprocesses, so dispatch them all
+        # at once; runtime is bounded by the slowest test instead of the
+        # sum of every timeout
+        tests = TEST_REGISTRY['all'](self, targets)
+
+        for name, test_result in asyncio.run(self._gather_tests(tests)):
+            self.results['tests'][name] = test_result
+
+
+        # Summary — one pass over the statuses instead of one per bucket
+        counts = Counter(test['status'] for test in self.results['tests'].values())
+        passed = counts.get('passed', 0)
+        warning = counts.get('warning', 0)
+        failed = counts.get('failed', 0)
+        error = counts.get('error', 0)
         total = len(self.results['tests'])
         
         self.results['summary'] = {
@@ -314,21 +497,50 @@ class TelecomDiagnostics:
             'success_rate': round((passed / total) * 100, 1) if total > 0 else 0
         }
         
-        logger.info(f"Tests completed: {passed}/{total} passed, {warning} warnings, {failed} failed")
+        logger.info("Tests completed: %d/%d passed, %d warnings, %d failed",
+                    passed, total, warning, failed)
         
         return self.results
     
     def generate_report(self, output_file: str = None) -> str:
         """Generate diagnostic report"""
         if not output_file:
-            output_file = f"/var/log/diagnostics-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+            output_file = f"/var/log/diagnostics-report-{time.strftime('%Y%m%d-%H%M%S')}.json"
         
-        with open(output_file, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(_render_json(self.results))
         
-        logger.info(f"Diagnostic report saved to: {output_file}")
+        logger.info("Diagnostic report saved to: %s", output_file)
         return output_file
 
+def _sip_tests(diag: TelecomDiagnostics, targets: List[str]) -> List[Tuple]:
+    return [(diag.target_keys(t)[0], lambda t=t: diag.test_sip_connectivity(t))
+            for t in targets]
+
+def _radius_tests(diag: TelecomDiagnostics, targets: List[str]) -> List[Tuple]:
+    return [(diag.target_keys(t)[1], lambda t=t: diag.test_radius_auth(t))
+            for t in targets]
+
+def _galera_tests(diag: TelecomDiagnostics, targets: List[str]) -> List[Tuple]:
+    return [('galera_cluster', diag.test_galera_cluster)]
+
+def _monitoring_tests(diag: TelecomDiagnostics, targets: List[str]) -> List[Tuple]:
+    return [('monitoring_endpoints', diag.test_monitoring_endpoints)]
+
+# Single source of truth for test dispatch: every --test choice maps to
+# a builder returning (name, callable) pairs for the concurrent runner
+TEST_REGISTRY = {
+    'sip': _sip_tests,
+    'radius': _radius_tests,
+    'galera': _galera_tests,
+    'monitoring': _monitoring_tests,
+}
+TEST_REGISTRY['all'] = lambda diag, targets: [
+    test for build in (_sip_tests, _radius_tests, _galera_tests,
+                       _monitoring_tests)
+    for test in build(diag, targets)
+]
+
 def main():
     parser = argparse.ArgumentParser(description='Telecom Lab HA3 Diagnostics Tool')
     parser.add_argument('--targets', nargs='+', default=['127.0.0.1', '192.168.56.254'],
@@ -343,22 +555,16 @@ def main():
     diagnostics = TelecomDiagnostics()
     
     if args.test == 'all':
-        results = diagnostics.run_comprehensive_test(args.targets)
-    elif args.test == 'sip':
-        for target in args.targets:
-            test_name = f"sip_test_{target.replace('.', '_')}"
-            diagnostics.results['tests'][test_name] = diagnostics.test_sip_connectivity(target)
-    elif args.test == 'radius':
-        for target in args.targets:
-            test_name = f"radius_test_{target.replace('.', '_')}"
-            diagnostics.results['tests'][test_name] = diagnostics.test_radius_auth(target)
-    elif args.test == 'galera':
-        diagnostics.results['tests']['galera_cluster'] = diagnostics.test_galera_cluster()
-    elif args.test == 'monitoring':
-        diagnostics.results['tests']['monitoring_endpoints'] = diagnostics.test_monitoring_endpoints()
+        diagnostics.run_comprehensive_test(args.targets)
+    else:
+        # Single-type runs go through the same concurrent dispatch as
+        # the comprehensive case, just without the summary block
+        tests = TEST_REGISTRY[args.test](diagnostics, args.targets)
+        for name, test_result in asyncio.run(diagnostics._gather_tests(tests)):
+            diagnostics.results['tests'][name] = test_result
     
     if args.json:
-        print(json.dumps(diagnostics.results, indent=2))
+        print(_render_json(diagnostics.results).decode())
     else:
         # Pretty print summary
         print(f"\n=== Telecom Lab HA3 Diagnostics ===")
@@ -389,4 +595,14 @@ def main():
         diagnostics.generate_report(args.output)
 
 if __name__ == '__main__':
+    # Configure logging only when run as a script, so importing the
+    # module doesn't force-open the log file
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('/var/log/sip-radius-diagnostics.log'),
+            logging.StreamHandler()
+        ]
+    )
     main()